@@ -2,67 +2,97 @@
 配置管理模块
 """
 import os
-from typing import List, Dict, Any
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Tuple, Mapping, Any, Optional
 from dotenv import load_dotenv
 
 # 加载 .env 文件
 load_dotenv()
 
 
+@lru_cache(maxsize=1)
+def _parse_mention_users(mention_users_str: str) -> Tuple[str, ...]:
+    """解析逗号分隔的用户 ID 列表（按原始环境变量字符串缓存）"""
+    return tuple(uid.strip() for uid in mention_users_str.split(",") if uid.strip())
+
+
+@lru_cache(maxsize=1)
+def _load_notifications(
+    env: str,
+    chat_id_all: Optional[str],
+    chat_id_team: Optional[str],
+    mention_users_str: Optional[str]
+) -> Tuple[Mapping[str, Any], ...]:
+    """
+    加载飞书通知配置
+
+    本地调试模式（ENV=local）：
+    - 不发送通知，返回空元组
+
+    生产环境（ENV=production）：
+    - 从环境变量加载通知配置
+
+    返回值为只读结构（元组 + MappingProxyType），可以安全地缓存和共享
+    """
+    # 本地调试模式：不发送通知
+    if env == "local":
+        return ()
+
+    # 生产环境：从环境变量加载配置
+    notifications = []
+
+    # 添加 @所有人 的群
+    if chat_id_all:
+        notifications.append(MappingProxyType({
+            "chat_id": chat_id_all,
+            "mention_all": True
+        }))
+
+    # 添加 @指定用户 的群
+    if chat_id_team and mention_users_str:
+        mention_user_ids = _parse_mention_users(mention_users_str)
+        if mention_user_ids:
+            notifications.append(MappingProxyType({
+                "chat_id": chat_id_team,
+                "mention_user_ids": mention_user_ids
+            }))
+
+    return tuple(notifications)
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
-    """应用配置类"""
-    
-    def __init__(self):
-        # 环境标识：local（本地调试）或 production（生产环境）
-        self.ENV = os.getenv("ENV", "production")
-        
-        # 飞书应用配置
-        self.FEISHU_APP_ID = os.getenv("FEISHU_APP_ID")
-        self.FEISHU_APP_SECRET = os.getenv("FEISHU_APP_SECRET")
-        self.FEISHU_WIKI_URL = os.getenv("FEISHU_WIKI_URL")
-        
-        # 飞书通知配置
-        self.FEISHU_NOTIFICATIONS = self._load_notifications()
-    
-    def _load_notifications(self) -> List[Dict[str, Any]]:
-        """
-        加载飞书通知配置
-        
-        本地调试模式（ENV=local）：
-        - 不发送通知，返回空列表
-        
-        生产环境（ENV=production）：
-        - 从环境变量加载通知配置
-        """
-        # 本地调试模式：不发送通知
-        if self.ENV == "local":
-            return []
-        
-        # 生产环境：从环境变量加载配置
-        notifications = []
-        
-        # 添加 @所有人 的群
-        chat_id_all = os.getenv("FEISHU_CHAT_ID_ALL")
-        if chat_id_all:
-            notifications.append({
-                "chat_id": chat_id_all,
-                "mention_all": True
-            })
-        
-        # 添加 @指定用户 的群
-        chat_id_team = os.getenv("FEISHU_CHAT_ID_TEAM")
-        mention_users_str = os.getenv("FEISHU_MENTION_USERS")
-        
-        if chat_id_team and mention_users_str:
-            mention_user_ids = [uid.strip() for uid in mention_users_str.split(",") if uid.strip()]
-            if mention_user_ids:
-                notifications.append({
-                    "chat_id": chat_id_team,
-                    "mention_user_ids": mention_user_ids
-                })
-        
-        return notifications
-    
+    """应用配置类（创建后只读）"""
+
+    # 环境标识：local（本地调试）或 production（生产环境）
+    ENV: str = field(default_factory=lambda: os.getenv("ENV", "production"))
+
+    # 飞书应用配置
+    FEISHU_APP_ID: Optional[str] = field(default_factory=lambda: os.getenv("FEISHU_APP_ID"))
+    FEISHU_APP_SECRET: Optional[str] = field(default_factory=lambda: os.getenv("FEISHU_APP_SECRET"), repr=False)
+    FEISHU_WIKI_URL: Optional[str] = field(default_factory=lambda: os.getenv("FEISHU_WIKI_URL"))
+
+    # 飞书通知配置
+    FEISHU_NOTIFICATIONS: Tuple[Mapping[str, Any], ...] = field(init=False)
+
+    # 数据异常警告发送的群聊（第一个 mention_all=True 的群）
+    WARNING_CHAT_ID: Optional[str] = field(init=False)
+
+    def __post_init__(self):
+        notifications = _load_notifications(
+            self.ENV,
+            os.getenv("FEISHU_CHAT_ID_ALL"),
+            os.getenv("FEISHU_CHAT_ID_TEAM"),
+            os.getenv("FEISHU_MENTION_USERS")
+        )
+        object.__setattr__(self, "FEISHU_NOTIFICATIONS", notifications)
+        object.__setattr__(self, "WARNING_CHAT_ID", next(
+            (config["chat_id"] for config in notifications if config.get("mention_all")),
+            None
+        ))
+
     def validate(self) -> bool:
         """验证必要的配置是否存在"""
         if not self.FEISHU_APP_ID:
@@ -2,13 +2,94 @@
 飞书多维表格数据模型
 用于映射和存储从飞书多维表格读取的记录数据
 """
-from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+import sys
+from operator import itemgetter
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple, Union, get_args, get_origin, get_type_hints
 from datetime import datetime
 from packaging import version
 
+# to_dict 使用的字段类别：标量 / 嵌套数据类 / 数据类列表
+_KIND_SCALAR = 0
+_KIND_DATACLASS = 1
+_KIND_DATACLASS_LIST = 2
 
-@dataclass
+# 飞书字段名 -> 模型属性名 的映射表，模块加载时构建一次
+# 直接取值的字段
+_SCALAR_FIELD_MAP = tuple((sys.intern(attr), sys.intern(key)) for attr, key in (
+    ('apple_id', 'Apple ID'),
+    ('package_name', '包名'),
+    ('package_status', '包状态'),
+    ('version', '版本号'),
+    ('test_package_name', '测试包名'),
+    ('production_package_name', '生产包名'),
+    ('package_size', '包Size'),
+    ('product_code', '商品code'),
+    ('team', '团队'),
+    ('quarter', '所属季度'),
+    ('stage', '阶段'),
+    ('af_aj_info', '是否申请AF/AJ'),
+    ('machine_location', '机器位置'),
+    ('development_days', '开发人日'),
+    ('application_topic', '应用选题'),
+    ('exception_category', '异常类别'),
+    ('refund_callback_url', '退款回调地址'),
+    ('privacy_policy', '隐私协议'),
+    ('update_description', '更新文案'),
+    ('notes', '备注'),
+))
+
+# 用户列表字段
+_USER_FIELD_MAP = tuple((sys.intern(attr), sys.intern(key)) for attr, key in (
+    ('developers', '开发人员'),
+    ('designers', '设计人员'),
+    ('package_sender', '发包人员'),
+))
+
+# 时间戳字段（毫秒）
+_TIMESTAMP_FIELD_MAP = tuple((sys.intern(attr), sys.intern(key)) for attr, key in (
+    ('submission_time', '提审时间'),
+    ('approval_time', '过审时间'),
+    ('status_update_time', '包状态更新时间'),
+    ('exception_time', '异常时间'),
+))
+
+
+def _parse_ts(value: Any) -> Optional[int]:
+    """
+    解析时间戳字段（毫秒），统一转换为整数
+    
+    空值返回 None；数字直接取整；字符串按浮点数解析，无法解析时返回 None
+    """
+    if not value:
+        return None
+    cls = value.__class__
+    if cls is int:
+        return value
+    if cls is float:
+        return int(value)
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse_version(value: Any) -> Optional[version.Version]:
+    """使用 packaging.version 解析版本号，空值或格式不规范时返回 None"""
+    if not value:
+        return None
+    try:
+        return version.parse(value)
+    except (version.InvalidVersion, TypeError):
+        return None
+
+
+# max() 的 key：取 (解析后的版本号, 子记录) 中的版本号
+_get_parsed_version = itemgetter(0)
+
+
+@dataclass(frozen=True, slots=True)
 class FileInfo:
     """文件信息模型"""
     file_token: str
@@ -19,14 +100,14 @@ class FileInfo:
     url: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LinkInfo:
     """链接信息模型"""
     link: str
     text: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UserInfo:
     """用户信息模型"""
     email: str
@@ -36,7 +117,7 @@ class UserInfo:
     avatar_url: Optional[str] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ParentRecord:
     """父记录引用模型"""
     table_id: str
@@ -46,7 +127,7 @@ class ParentRecord:
     type: str = "text"
 
 
-@dataclass
+@dataclass(slots=True)
 class ApplePackageRecord:
     """Apple 包记录模型"""
     # 基础信息
@@ -97,118 +178,76 @@ class ApplePackageRecord:
     record_id: Optional[str] = None  # 记录ID
     children: List['ApplePackageRecord'] = field(default_factory=list)  # 子记录列表（版本记录）
     
-    @classmethod
-    def from_feishu_fields(cls, fields: Dict[str, Any], record_id: Optional[str] = None) -> 'ApplePackageRecord':
+    # 缓存（不参与初始化、比较和序列化）
+    # 请通过 set_children 设置子记录，它会同时重建/重置这些缓存；
+    # 直接修改 children 后需要自行调用 set_children(self.children)
+    _latest_version_cache: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _children_by_version: Optional[Dict[str, 'ApplePackageRecord']] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    # from_feishu_fields(fields, record_id=None) 在模块加载时由 _make_from_feishu_fields 生成，
+    # 从飞书字段字典创建模型实例
+    
+    def to_dict(self) -> Dict[str, Any]:
         """
-        从飞书字段字典创建模型实例
-        
-        Args:
-            fields: 飞书多维表格的字段字典
-            record_id: 记录ID
-        
-        Returns:
-            ApplePackageRecord 实例
+        转换为字典格式
+
+        字段名和字段类别在模块加载时预先计算（见 _FIELD_NAMES / _FIELD_KIND）；
+        只有数据类实例会被转换，其他值原样输出
         """
-        # 处理文件信息
-        logo = None
-        if 'logo' in fields and fields['logo']:
-            logo = [FileInfo(**item) if isinstance(item, dict) else item for item in fields['logo']]
-        
-        # 处理链接信息
-        repository_url = None
-        if '仓库地址' in fields and fields['仓库地址']:
-            repo_data = fields['仓库地址']
-            if isinstance(repo_data, dict):
-                repository_url = LinkInfo(**repo_data)
+        result = {}
+        for name, kind in zip(self._FIELD_NAMES, self._FIELD_KIND):
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if kind == _KIND_SCALAR:
+                result[name] = value
+            elif kind == _KIND_DATACLASS:
+                result[name] = _slots_to_dict(value) if is_dataclass(value) else value
             else:
-                repository_url = LinkInfo(link=str(repo_data), text=str(repo_data))
-        
-        # 处理用户信息
-        def parse_user_list(field_name: str) -> Optional[List[UserInfo]]:
-            if field_name not in fields or not fields[field_name]:
-                return None
-            users = fields[field_name]
-            if isinstance(users, list):
-                return [UserInfo(**user) if isinstance(user, dict) else user for user in users]
-            return None
+                # 解析时格式不符的列表项会原样保留，这里也原样输出
+                result[name] = [
+                    _slots_to_dict(item) if is_dataclass(item) else item
+                    for item in value
+                ]
+        return result
+    
+    def set_children(self, children: List['ApplePackageRecord']) -> None:
+        """
+        设置子记录列表，并一次性建立 版本号 -> 子记录 的索引
         
-        developers = parse_user_list('开发人员')
-        designers = parse_user_list('设计人员')
-        package_sender = parse_user_list('发包人员')
+        Args:
+            children: 子记录列表（版本记录）
+        """
+        self.children = children
+        self._latest_version_cache = None
+        self._children_by_version = _index_children_by_version(children)
+    
+    def get_child_by_version(self, child_version: Optional[str]) -> Optional['ApplePackageRecord']:
+        """
+        按版本号查找子记录（O(1)）
         
-        # 处理父记录
-        parent_record = None
-        if '父记录' in fields and fields['父记录']:
-            parent_data = fields['父记录']
-            if isinstance(parent_data, list):
-                parent_record = []
-                for item in parent_data:
-                    if isinstance(item, dict):
-                        parent_record.append(ParentRecord(**item))
-                    else:
-                        parent_record.append(item)
+        版本号重复时返回第一条匹配的子记录
         
-        # 处理时间戳字段（转换为整数）
-        def parse_timestamp(field_name: str) -> Optional[int]:
-            if field_name not in fields or not fields[field_name]:
-                return None
-            value = fields[field_name]
-            if isinstance(value, (int, float)):
-                return int(value)
-            if isinstance(value, str):
-                try:
-                    return int(float(value))
-                except (ValueError, TypeError):
-                    return None
-            return None
+        Args:
+            child_version: 版本号
         
-        return cls(
-            record_id=record_id,
-            apple_id=fields.get('Apple ID'),
-            package_name=fields.get('包名'),
-            package_status=fields.get('包状态'),
-            version=fields.get('版本号'),
-            test_package_name=fields.get('测试包名'),
-            production_package_name=fields.get('生产包名'),
-            package_size=fields.get('包Size'),
-            logo=logo,
-            repository_url=repository_url,
-            product_code=fields.get('商品code'),
-            team=fields.get('团队'),
-            quarter=fields.get('所属季度'),
-            stage=fields.get('阶段'),
-            developers=developers,
-            designers=designers,
-            package_sender=package_sender,
-            submission_time=parse_timestamp('提审时间'),
-            approval_time=parse_timestamp('过审时间'),
-            status_update_time=parse_timestamp('包状态更新时间'),
-            exception_time=parse_timestamp('异常时间'),
-            af_aj_info=fields.get('是否申请AF/AJ'),
-            machine_location=fields.get('机器位置'),
-            development_days=fields.get('开发人日'),
-            application_topic=fields.get('应用选题'),
-            exception_category=fields.get('异常类别'),
-            refund_callback_url=fields.get('退款回调地址'),
-            privacy_policy=fields.get('隐私协议'),
-            update_description=fields.get('更新文案'),
-            notes=fields.get('备注'),
-            parent_record=parent_record
-        )
+        Returns:
+            对应的子记录，不存在时返回 None
+        """
+        return self.children_by_version.get(child_version)
     
-    def to_dict(self) -> Dict[str, Any]:
-        """转换为字典格式"""
-        result = {}
-        for key, value in self.__dict__.items():
-            if value is None:
-                continue
-            if isinstance(value, list):
-                result[key] = [item.__dict__ if hasattr(item, '__dict__') else item for item in value]
-            elif hasattr(value, '__dict__'):
-                result[key] = value.__dict__
-            else:
-                result[key] = value
-        return result
+    @property
+    def children_by_version(self) -> Mapping[str, 'ApplePackageRecord']:
+        """
+        版本号 -> 子记录 的只读索引
+        
+        通常在 set_children 时建立；直接赋值 children 的记录在首次访问时建立
+        """
+        if self._children_by_version is None:
+            self._children_by_version = _index_children_by_version(self.children)
+        return MappingProxyType(self._children_by_version)
     
     def get_submission_datetime(self) -> Optional[datetime]:
         """获取提审时间的 datetime 对象"""
@@ -230,35 +269,33 @@ class ApplePackageRecord:
         1. 如果没有子记录，最新版本为：版本号
         2. 如果有子记录，最新版本为：版本号最大的那条子记录的版本号
         
+        结果会缓存在记录上，重复调用为 O(1)
+        
         Returns:
             最新版本号
         """
+        if self._latest_version_cache is not None:
+            return self._latest_version_cache
+        self._latest_version_cache = self._compute_latest_version()
+        return self._latest_version_cache
+    
+    def _compute_latest_version(self) -> Optional[str]:
+        """按 get_latest_version 的规则计算最新版本号（不使用缓存）"""
         if not self.children:
             # 没有子记录，返回自己的版本号
             return self.version
         
-        # 有子记录，找到版本号最大的子记录
-        latest_child = None
-        latest_version = None
-        
-        for child in self.children:
-            if not child.version:
-                continue
-            
-            try:
-                # 使用 packaging.version 进行版本号比较
-                child_version = version.parse(child.version)
-                
-                if latest_version is None or child_version > latest_version:
-                    latest_version = child_version
-                    latest_child = child
-            except Exception:
-                # 如果版本号格式不规范，跳过该子记录
-                continue
+        # 有子记录，找到版本号最大的子记录（版本号格式不规范的子记录会被跳过）
+        parsed = (
+            (child_version, child)
+            for child in self.children
+            if (child_version := _parse_version(child.version)) is not None
+        )
+        latest = max(parsed, key=_get_parsed_version, default=None)
         
         # 如果找到了有效版本号的子记录，返回其版本号
-        if latest_child and latest_child.version:
-            return latest_child.version
+        if latest is not None:
+            return latest[1].version
         
         # 如果没有找到有效版本号的子记录，返回自己的版本号
         return self.version
@@ -312,3 +349,166 @@ class ApplePackageRecord:
             'errors': errors
         }
 
+
+def _index_children_by_version(children: List[ApplePackageRecord]) -> Dict[str, ApplePackageRecord]:
+    """建立 版本号 -> 子记录 的索引（版本号重复时保留第一条）"""
+    index = {}
+    for child in children:
+        if child.version:
+            index.setdefault(child.version, child)
+    return index
+
+
+def _slots_to_dict(obj: Any) -> Dict[str, Any]:
+    """将 slots 数据类实例浅转换为字典（跳过下划线开头的缓存字段）"""
+    return {name: getattr(obj, name) for name in obj.__slots__ if not name.startswith('_')}
+
+
+def _field_kind(hint: Any) -> int:
+    """根据类型注解推断字段类别"""
+    if get_origin(hint) is Union:
+        # Optional[X] -> X
+        hint = next(arg for arg in get_args(hint) if arg is not type(None))
+    if get_origin(hint) is list:
+        item_type = get_args(hint)[0]
+        return _KIND_DATACLASS_LIST if is_dataclass(item_type) else _KIND_SCALAR
+    return _KIND_DATACLASS if is_dataclass(hint) else _KIND_SCALAR
+
+
+def _init_field_cache(cls: type) -> None:
+    """
+    在类创建后缓存字段名（已 intern）及其类别
+
+    - _ALL_FIELD_NAMES: 全部字段，用于构建实例模板
+    - _FIELD_NAMES / _FIELD_KIND: 公开字段（不含下划线开头的缓存字段），供 to_dict 使用
+    """
+    hints = get_type_hints(cls)
+    cls._ALL_FIELD_NAMES = tuple(sys.intern(f.name) for f in fields(cls))
+    names = tuple(name for name in cls._ALL_FIELD_NAMES if not name.startswith('_'))
+    cls._FIELD_NAMES = names
+    cls._FIELD_KIND = tuple(_field_kind(hints[name]) for name in names)
+
+
+_init_field_cache(ApplePackageRecord)
+
+
+# 已创建的 UserInfo 实例（按全部字段值去重）
+# 同一用户在多条记录中重复出现时共享同一个不可变实例；用户数量有限，缓存不会无限增长。
+# FileInfo 不做去重：tmp_url 每次读取都会重新签发，相同文件的字段值也不相同
+_USER_INFO_INTERN: Dict[Tuple[Any, ...], UserInfo] = {}
+
+
+def _mk_file_info(item: Dict[str, Any], _FileInfo=FileInfo) -> FileInfo:
+    """使用位置参数创建 FileInfo（避免 **kwargs 解包）"""
+    return _FileInfo(item['file_token'], item['name'], item['size'], item['tmp_url'], item['type'], item['url'])
+
+
+def _mk_user_info(item: Dict[str, Any], _UserInfo=UserInfo, _intern=_USER_INFO_INTERN) -> UserInfo:
+    """使用位置参数创建 UserInfo（避免 **kwargs 解包），相同内容复用已有实例"""
+    key = (item['email'], item['en_name'], item['id'], item['name'], item.get('avatar_url'))
+    user_info = _intern.get(key)
+    if user_info is None:
+        user_info = _intern[key] = _UserInfo(*key)
+    return user_info
+
+
+def _parse_files(value: Any) -> Optional[List[FileInfo]]:
+    """解析文件信息列表"""
+    if not value:
+        return None
+    return [_mk_file_info(item) if isinstance(item, dict) else item for item in value]
+
+
+def _parse_link(value: Any) -> Optional[LinkInfo]:
+    """解析链接信息，非字典值同时作为链接和文本"""
+    if not value:
+        return None
+    if isinstance(value, dict):
+        return LinkInfo(**value)
+    return LinkInfo(link=str(value), text=str(value))
+
+
+def _parse_users(value: Any) -> Optional[List[UserInfo]]:
+    """解析用户信息列表"""
+    if not value or not isinstance(value, list):
+        return None
+    return [_mk_user_info(user) if isinstance(user, dict) else user for user in value]
+
+
+def _parse_parents(value: Any) -> Optional[List[ParentRecord]]:
+    """解析父记录引用列表"""
+    if not value or not isinstance(value, list):
+        return None
+    return [ParentRecord(**item) if isinstance(item, dict) else item for item in value]
+
+
+# 需要解析的嵌套字段：(属性名, 飞书字段名, 解析函数)
+_NESTED_FIELD_MAP = (
+    ('logo', 'logo', _parse_files),
+    ('repository_url', '仓库地址', _parse_link),
+    ('parent_record', '父记录', _parse_parents),
+) + tuple((attr, key, _parse_users) for attr, key in _USER_FIELD_MAP)
+
+
+def _make_from_feishu_fields(cls: type) -> None:
+    """
+    生成并挂载 cls.from_feishu_fields
+
+    按映射表生成一段直线式代码：逐个字段直接写入实例 slot，没有循环和
+    __init__ 参数绑定；用到的解析函数作为仅限关键字的默认参数传入，
+    在函数内是局部变量
+    """
+    exprs = {'record_id': 'record_id'}
+    namespace = {'_new': object.__new__, '_parse_ts': _parse_ts}
+    for attr, key in _SCALAR_FIELD_MAP:
+        exprs[attr] = f'get({key!r})'
+    for attr, key in _TIMESTAMP_FIELD_MAP:
+        exprs[attr] = f'_parse_ts(get({key!r}))'
+    for attr, key, parser in _NESTED_FIELD_MAP:
+        namespace[parser.__name__] = parser
+        exprs[attr] = f'{parser.__name__}(get({key!r}))'
+    
+    # 没有映射的字段使用 dataclass 声明的默认值
+    for f in fields(cls):
+        if f.name in exprs:
+            continue
+        if f.default_factory is not MISSING:
+            namespace[f'_factory_{f.name}'] = f.default_factory
+            exprs[f.name] = f'_factory_{f.name}()'
+        else:
+            namespace[f'_default_{f.name}'] = f.default
+            exprs[f.name] = f'_default_{f.name}'
+    
+    params = ', '.join(f'{name}={name}' for name in namespace)
+    lines = [
+        f'def from_feishu_fields(cls, fields, record_id=None, *, {params}):',
+        '    get = fields.get',
+        '    obj = _new(cls)',
+    ]
+    lines += [f'    obj.{name} = {exprs[name]}' for name in cls._ALL_FIELD_NAMES]
+    lines.append('    return obj')
+    
+    exec('\n'.join(lines), namespace)
+    func = namespace['from_feishu_fields']
+    func.__qualname__ = f'{cls.__name__}.from_feishu_fields'
+    func.__doc__ = """
+        从飞书字段字典创建模型实例
+        
+        Args:
+            fields: 飞书多维表格的字段字典
+            record_id: 记录ID
+        
+        Returns:
+            ApplePackageRecord 实例
+        """
+    cls.from_feishu_fields = classmethod(func)
+
+
+_make_from_feishu_fields(ApplePackageRecord)
+
+# 模型会读取的全部飞书字段名（用于读取记录时只请求需要的列）
+FEISHU_FIELD_NAMES: Tuple[str, ...] = tuple(dict.fromkeys(
+    [key for _, key in _SCALAR_FIELD_MAP]
+    + [key for _, key in _TIMESTAMP_FIELD_MAP]
+    + [key for _, key, _ in _NESTED_FIELD_MAP]
+))
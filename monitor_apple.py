@@ -2,50 +2,126 @@
 Apple 应用监控主程序
 负责业务流程编排
 """
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Tuple
+from functools import cached_property
+from typing import List, Tuple, Dict, Any, Optional, Callable, Iterable, Iterator, Sequence
 from models.record import ApplePackageRecord
+from services.feishu_client import build_feishu_client
 from services.feishu_service import FeishuBitableService
 from services.feishu_messenger import FeishuMessenger
 from services.apple_service import AppleStoreService
 from utils.logger import (
-    log_group, log_endgroup, log_info, log_warning, 
-    log_error, log_success, is_github_actions
+    log_group, log_endgroup, log_info, log_block, log_debug, log_warning, 
+    log_error, log_success, is_github_actions, is_verbose
 )
 from utils.url_parser import parse_wiki_url
 from config.settings import settings
 
+# 并发查询 Apple Store 状态的线程数（每个线程一次请求一批 ID）
+# 保持较小，避免 iTunes 限流时多个批次同时重试放大请求量
+APPLE_QUERY_WORKERS = 4
+
+
+def _format_ms_date(timestamp_ms: Optional[int]) -> str:
+    """
+    将毫秒时间戳格式化为 YYYY-MM-DD（本地时区）
+    
+    使用 time.localtime + time.strftime，不创建 datetime 对象；
+    为空时返回"无"，无法转换时返回原始值
+    """
+    if not timestamp_ms:
+        return "无"
+    try:
+        return time.strftime('%Y-%m-%d', time.localtime(timestamp_ms // 1000))
+    except (OverflowError, OSError, ValueError, TypeError):
+        return str(timestamp_ms)
+
 
 class AppleMonitor:
     """Apple 应用监控类 - 负责业务流程编排"""
     
     def __init__(
         self,
-        feishu_service: FeishuBitableService,
-        feishu_messenger: FeishuMessenger,
-        apple_service: AppleStoreService
+        feishu_service_factory: Callable[[], FeishuBitableService],
+        feishu_messenger_factory: Callable[[], FeishuMessenger],
+        apple_service_factory: Callable[[], AppleStoreService]
     ):
         """
         初始化监控器
         
+        服务实例在第一次使用时才通过工厂函数创建，配置校验失败时不会创建任何客户端
+        
         Args:
-            feishu_service: 飞书表格服务
-            feishu_messenger: 飞书消息服务
-            apple_service: Apple Store 服务
+            feishu_service_factory: 创建飞书表格服务的工厂函数
+            feishu_messenger_factory: 创建飞书消息服务的工厂函数
+            apple_service_factory: 创建 Apple Store 服务的工厂函数
         """
-        self.feishu_service = feishu_service
-        self.feishu_messenger = feishu_messenger
-        self.apple_service = apple_service
+        self._feishu_service_factory = feishu_service_factory
+        self._feishu_messenger_factory = feishu_messenger_factory
+        self._apple_service_factory = apple_service_factory
+    
+    @cached_property
+    def feishu_service(self) -> FeishuBitableService:
+        """飞书表格服务（首次访问时创建）"""
+        return self._feishu_service_factory()
+    
+    @cached_property
+    def feishu_messenger(self) -> FeishuMessenger:
+        """飞书消息服务（首次访问时创建）"""
+        return self._feishu_messenger_factory()
+    
+    @cached_property
+    def apple_service(self) -> AppleStoreService:
+        """Apple Store 服务（首次访问时创建）"""
+        return self._apple_service_factory()
+    
+    def close(self) -> None:
+        """释放已创建服务持有的连接（未创建的服务不会被创建）"""
+        apple_service = self.__dict__.pop('apple_service', None)
+        if apple_service is not None:
+            apple_service.close()
     
+    def __enter__(self) -> 'AppleMonitor':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def filter_records_by_stage(
+        self,
+        records: Iterable[ApplePackageRecord],
+        excluded_stage: str = "五图"
+    ) -> Iterator[ApplePackageRecord]:
+        """
+        过滤掉指定阶段的记录
+        
+        以生成器方式逐条产出，可以直接作为 validate_records 的输入，不生成中间列表
+        
+        Args:
+            records: 要过滤的记录
+            excluded_stage: 要过滤掉的阶段，默认为"五图"
+        
+        Yields:
+            阶段不等于 excluded_stage 的记录
+        """
+        for record in records:
+            if record.stage != excluded_stage:
+                yield record
+            else:
+                log_info(f"过滤掉: {record.package_name} (阶段: {record.stage})")
+
     def validate_records(
         self,
-        records: List[ApplePackageRecord]
+        records: Iterable[ApplePackageRecord]
     ) -> Tuple[List[ApplePackageRecord], List[Tuple[ApplePackageRecord, List[str]]]]:
         """
         验证记录数据的完整性
         
         Args:
-            records: 要验证的记录列表
+            records: 要验证的记录（列表或生成器，只遍历一次）
         
         Returns:
             (valid_records, invalid_records) 元组
@@ -62,86 +138,94 @@ class AppleMonitor:
                 valid_records.append(record)
                 latest_version = record.get_latest_version()
                 
-                # 调试信息：打印子记录详情
+                # 调试信息：打印子记录详情（仅 VERBOSE=1 时输出）
                 if record.children:
-                    log_info(f"✅ {record.package_name}: 最新版本 = {latest_version} (来自子记录)")
-                    log_info(f"  父记录版本: {record.version}")
-                    log_info(f"  子记录数量: {len(record.children)}")
-                    for idx, child in enumerate(record.children, 1):
-                        log_info(f"    子记录{idx}: 版本={child.version}, 提审时间={child.submission_time}")
+                    log_info("✅ %s: 最新版本 = %s (来自子记录)", record.package_name, latest_version)
+                    log_debug("  父记录版本: %s", record.version)
+                    log_debug("  子记录数量: %s", len(record.children))
+                    if is_verbose():
+                        for idx, child in enumerate(record.children, 1):
+                            log_debug("    子记录%s: 版本=%s, 提审时间=%s", idx, child.version, child.submission_time)
                 else:
-                    log_info(f"✅ {record.package_name}: 最新版本 = {latest_version} (主记录)")
+                    log_info("✅ %s: 最新版本 = %s (主记录)", record.package_name, latest_version)
             else:
                 invalid_records.append((record, validation_result['errors']))
-                log_warning(f"❌ {record.package_name}: 数据异常")
+                log_warning("❌ %s: 数据异常", record.package_name)
                 for error in validation_result['errors']:
-                    log_warning(f"  - {error}")
+                    log_warning("  - %s", error)
         
         return valid_records, invalid_records
 
-    def update_app_status(
+    def query_app_statuses(
+        self,
+        records: List[ApplePackageRecord]
+    ) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        批量查询多条记录的 Apple Store 状态
+        
+        去重和分批由 AppleStoreService 负责，这里只提供并发执行批次请求的线程池
+        
+        Args:
+            records: 需要查询的记录列表（需包含 apple_id）
+        
+        Returns:
+            Apple ID -> 应用信息字典（查询失败为 None）
+        """
+        apple_ids = [record.apple_id for record in records if record.apple_id]
+        if not apple_ids:
+            return {}
+        
+        # 在提交任务前取出服务实例，避免多个线程同时触发延迟创建
+        apple_service = self.apple_service
+        with ThreadPoolExecutor(max_workers=APPLE_QUERY_WORKERS) as executor:
+            return apple_service.query_app_statuses(apple_ids, executor=executor)
+
+    def build_status_updates(
         self,
-        app_token: str,
-        table_id: str,
         record: ApplePackageRecord,
         latest_version: str,
         current_date_timestamp: int
-    ) -> None:
+    ) -> List[Dict[str, Any]]:
         """
-        更新应用的飞书表格状态
+        生成应用上线后需要写回飞书表格的更新
+        
+        规则：
+        1. 没有子记录：更新主记录的状态和过审时间
+        2. 有子记录：更新对应版本子记录的状态和过审时间，主记录只更新状态
+        
+        只生成更新内容，不发起请求；由调用方汇总后通过一次批量请求提交
         
         Args:
-            app_token: 多维表格的应用 Token
-            table_id: 表格 ID
             record: 应用记录
             latest_version: 最新版本号
             current_date_timestamp: 当前日期的时间戳（毫秒）
+        
+        Returns:
+            更新列表，每个元素包含 record_id 和 fields
         """
-        log_info("📝 更新飞书表格状态...")
-
-        # 要更新的字段
-        update_child_fields = {
+        # 本次过审的版本记录：写入状态和过审时间
+        approved_fields = {
             "包状态": "已发布",
             "过审时间": current_date_timestamp  # 使用时间戳（毫秒）
         }
-
-        # 更新主记录的字段
-        update_fields = {
-            "包状态": "已发布",
-        }    
-        
-        if record.children:
-            # 有子记录：找到对应版本号的子记录并更新
-            target_child = None
-            for child in record.children:
-                if child.version == latest_version:
-                    target_child = child
-                    break
-            
-            if target_child:
-                # 更新子记录状态
-                log_info(f"  更新子记录: {target_child.record_id} (版本: {target_child.version})")
-                self.feishu_service.update_record_fields(
-                    app_token=app_token,
-                    table_id=table_id,
-                    record_id=target_child.record_id,
-                    fields=update_child_fields
-                )
-        else:        
-            # 如果没有子记录, 那么当前记录只有一条记录，则记录过审时间
-            update_fields = {
-                "包状态": "已发布",
-                "过审时间": current_date_timestamp 
-            } 
-
-        # 没有子记录：只更新主记录, 只更新状态，不更新时间
-        log_info(f"  更新主记录: {record.record_id}")
-        self.feishu_service.update_record_fields(
-            app_token=app_token,
-            table_id=table_id,
-            record_id=record.record_id,
-            fields=update_fields
-        )
+        
+        if not record.children:
+            # 没有子记录：主记录本身就是版本记录
+            log_info(f"  待更新主记录: {record.record_id}（状态 + 过审时间）")
+            return [{"record_id": record.record_id, "fields": approved_fields}]
+        
+        updates = []
+        
+        # 有子记录：找到对应版本号的子记录，写入状态和过审时间
+        target_child = record.get_child_by_version(latest_version)
+        if target_child:
+            log_info(f"  待更新子记录: {target_child.record_id} (版本: {target_child.version})（状态 + 过审时间）")
+            updates.append({"record_id": target_child.record_id, "fields": approved_fields})
+        
+        # 主记录只更新状态：其过审时间保留首个版本的过审时间，不覆盖
+        log_info(f"  待更新主记录: {record.record_id}（仅状态）")
+        updates.append({"record_id": record.record_id, "fields": {"包状态": "已发布"}})
+        return updates
 
     def run(self) -> List[ApplePackageRecord]:
         """
@@ -164,7 +248,11 @@ class AppleMonitor:
             log_info("  - FEISHU_APP_SECRET")
             log_info("  - FEISHU_WIKI_URL")
             return []
-        
+
+        # 配置了通知但没有 @所有人 的群时，数据异常警告无法发送，启动时提前提示
+        if settings.FEISHU_NOTIFICATIONS and not settings.WARNING_CHAT_ID:
+            log_warning("未配置 mention_all=True 的群聊（FEISHU_CHAT_ID_ALL），数据异常警告将不会发送")
+
         # 解析 wiki URL
         log_group("📋 步骤 0: 解析 Wiki URL")
         wiki_node_token, table_id, view_id = parse_wiki_url(settings.FEISHU_WIKI_URL)
@@ -219,22 +307,13 @@ class AppleMonitor:
         )
         log_endgroup()
         
-        # 过滤出阶段 != "五图" 的所有记录
-        log_group("🔍 步骤 4: 过滤阶段 != '五图' 的记录")
-        filtered_records = []
-        for record in records:
-            if record.stage != "五图":
-                filtered_records.append(record)
-            else:
-                log_info(f"过滤掉: {record.package_name} (阶段: {record.stage})")
+        # 过滤出阶段 != "五图" 的记录并验证数据：过滤以生成器方式直接接入验证，只遍历一次
+        log_group("🔍 步骤 4-5: 过滤阶段 != '五图' 的记录并验证数据")
+        valid_records, invalid_records = self.validate_records(self.filter_records_by_stage(records))
+        filtered_count = len(valid_records) + len(invalid_records)
         
         log_info(f"过滤前: {len(records)} 个主应用")
-        log_info(f"过滤后: {len(filtered_records)} 个主应用（阶段 != '五图'）")
-        log_endgroup()
-        
-        # 数据验证：分离有效记录和异常记录
-        log_group("📦 步骤 5: 数据验证")
-        valid_records, invalid_records = self.validate_records(filtered_records)
+        log_info(f"过滤后: {filtered_count} 个主应用（阶段 != '五图'）")
         
         log_info(f"\n数据验证结果：")
         log_info(f"  有效记录: {len(valid_records)} 个")
@@ -250,29 +329,20 @@ class AppleMonitor:
                 if record.children:
                     log_info(f"      子记录数量: {len(record.children)}")
                     for child_idx, child in enumerate(record.children, 1):
-                        # 格式化提审时间
-                        submission_time_str = "无"
-                        if child.submission_time:
-                            try:
-                                dt = datetime.fromtimestamp(child.submission_time / 1000)
-                                submission_time_str = dt.strftime('%Y-%m-%d')
-                            except:
-                                submission_time_str = str(child.submission_time)
-                        
-                        log_info(f"        子记录{child_idx}: 版本={child.version}, 状态={child.package_status}, 提审时间={submission_time_str}, ID={child.record_id}")
+                        log_info(
+                            "        子记录%s: 版本=%s, 状态=%s, 提审时间=%s, ID=%s",
+                            child_idx, child.version, child.package_status,
+                            _format_ms_date(child.submission_time), child.record_id
+                        )
         
         log_endgroup()
         
         # 发送异常记录警告（调试期间暂时注释）
         if invalid_records:
             log_group("⚠️  步骤 6: 发送数据异常警告")
-            # 找到配置了 mention_all = True 的群聊
-            warning_chat_id = None
-            for config in settings.FEISHU_NOTIFICATIONS:
-                if config.get("mention_all"):
-                    warning_chat_id = config.get("chat_id")
-                    break
-            
+            # 配置了 mention_all = True 的群聊（加载配置时已确定）
+            warning_chat_id = settings.WARNING_CHAT_ID
+
             if warning_chat_id:
                 self.feishu_messenger.send_warning_message(
                     chat_id=warning_chat_id,
@@ -287,10 +357,21 @@ class AppleMonitor:
         log_info(f"只处理有效记录（共 {len(valid_records)} 个）")
         
         # 获取当前时间戳（毫秒）
-        current_timestamp = int(datetime.now().timestamp() * 1000)
+        current_timestamp = int(time.time() * 1000)
         
         success_count = 0
         skip_count = 0
+        query_failed_count = 0
+        
+        # 汇总所有待写回的更新和待发送的通知，循环结束后统一处理
+        pending_updates: List[Dict[str, Any]] = []
+        published: List[Tuple[ApplePackageRecord, str]] = []
+        
+        # 先并发查询所有需要检查的应用，再按记录顺序处理结果
+        app_statuses = self.query_app_statuses([
+            record for record in valid_records
+            if record.apple_id and record.get_latest_version()
+        ])
         
         for record in valid_records:
             if not record.apple_id:
@@ -305,12 +386,18 @@ class AppleMonitor:
                 skip_count += 1
                 continue
             
-            # 查询 Apple Store 状态
-            app_status = self.apple_service.query_app_status(record.apple_id, verbose=False)
+            # Apple Store 状态（已并发查询）
+            app_status = app_statuses.get(record.apple_id)
+            
+            # 查询失败（网络错误、重试次数用尽）和"未上线"区分开，不当作未上线处理
+            if app_status is None:
+                log_warning(f"{record.package_name} - Apple Store 查询失败，下次运行时重试")
+                query_failed_count += 1
+                continue
             
             # 判断版本是否已上线
             is_version_online = False
-            if app_status and app_status['is_online']:
+            if app_status['is_online']:
                 store_version = app_status['version']
                 if store_version and store_version == local_latest_version:
                     is_version_online = True
@@ -318,77 +405,112 @@ class AppleMonitor:
             # 处理已上线的应用
             if is_version_online:
                 log_success(f"{record.package_name} - 指定版本已上线")
-                log_info(f"  📱 应用名称: {app_status['track_name']}")
-                log_info(f"  📦 版本号: {store_version} (本地最新版本: {local_latest_version})")
-                log_info(f"  🆔 Apple ID: {record.apple_id}")
-                log_info(f"  📅 发布日期: {app_status['release_date']}")
-                log_info(f"  🔄 当前版本发布日期: {app_status['current_version_release_date']}")
+                lines = [
+                    f"  📱 应用名称: {app_status['track_name']}",
+                    f"  📦 版本号: {store_version} (本地最新版本: {local_latest_version})",
+                    f"  🆔 Apple ID: {record.apple_id}",
+                    f"  📅 发布日期: {app_status['release_date']}",
+                    f"  🔄 当前版本发布日期: {app_status['current_version_release_date']}",
+                ]
                 if app_status.get('track_view_url'):
-                    log_info(f"  🔗 应用链接: {app_status['track_view_url']}")
+                    lines.append(f"  🔗 应用链接: {app_status['track_view_url']}")
+                log_block(lines)
                 
-                # 更新飞书表格状态
-                self.update_app_status(
-                    app_token=app_token,
-                    table_id=table_id,
+                # 记录需要更新的飞书表格状态
+                pending_updates.extend(self.build_status_updates(
                     record=record,
                     latest_version=local_latest_version,
                     current_date_timestamp=current_timestamp
-                )
-                
-                # 发送飞书通知到多个群聊（调试期间暂时注释）
-                self.feishu_messenger.send_notifications(
-                    notifications=settings.FEISHU_NOTIFICATIONS,
-                    app_name=record.package_name,
-                    stage=record.stage or "未知",
-                    version=local_latest_version
-                )
+                ))
+                published.append((record, local_latest_version))
                 success_count += 1
             else:
                 # 未上线的应用
-                log_info(f"{record.package_name} - 指定版本未上线")
-                log_info(f"  📱 应用名称: {record.package_name}")
-                log_info(f"  📦 版本号: {local_latest_version}")
-                log_info(f"  🆔 Apple ID: {record.apple_id}")
+                log_block((
+                    f"{record.package_name} - 指定版本未上线",
+                    f"  📱 应用名称: {record.package_name}",
+                    f"  📦 版本号: {local_latest_version}",
+                    f"  🆔 Apple ID: {record.apple_id}",
+                ))
+        
+        # 批量更新飞书表格状态
+        if pending_updates:
+            log_info(f"📝 批量更新飞书表格状态（共 {len(pending_updates)} 条记录）...")
+            self.feishu_service.batch_update_record_fields(
+                app_token=app_token,
+                table_id=table_id,
+                updates=pending_updates
+            )
+        
+        # 发送飞书通知到多个群聊
+        # 逐条记录发送：同一群聊的消息串行发出，避免触发飞书单群发送频率限制；
+        # 不同群聊之间由 send_notifications 并发发送
+        for record, local_latest_version in published:
+            self.feishu_messenger.send_notifications(
+                notifications=settings.FEISHU_NOTIFICATIONS,
+                app_name=record.package_name,
+                stage=record.stage or "未知",
+                version=local_latest_version
+            )
  
         log_endgroup()
         
         # 打印任务总结
         log_group("📊 任务执行总结")
-        log_info(f"总共筛选: {len(filtered_records)} 个应用")
+        log_info(f"总共筛选: {filtered_count} 个应用")
         log_info(f"有效记录: {len(valid_records)} 个")
         log_info(f"异常记录: {len(invalid_records)} 个")
         log_info(f"成功上线: {success_count} 个")
         log_info(f"跳过处理: {skip_count} 个")
-        log_info(f"等待上线: {len(valid_records) - success_count - skip_count} 个")
+        log_info(f"查询失败: {query_failed_count} 个")
+        log_info(f"等待上线: {len(valid_records) - success_count - skip_count - query_failed_count} 个")
         log_info(f"完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         log_endgroup()
         
         return valid_records
 
 
-def main():
-    """主函数"""
-    # 创建服务实例
-    feishu_service = FeishuBitableService(
-        app_id=settings.FEISHU_APP_ID,
-        app_secret=settings.FEISHU_APP_SECRET
-    )
-    
-    feishu_messenger = FeishuMessenger(
-        app_id=settings.FEISHU_APP_ID,
-        app_secret=settings.FEISHU_APP_SECRET
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="监控提审中的 iOS 应用在 App Store 的上线状态")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="忽略本地缓存（app_token、连接测试结果），重新请求并刷新缓存"
     )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
     
-    apple_service = AppleStoreService()
+    # 表格服务和消息服务共用一个飞书客户端（只获取一次 tenant_access_token），
+    # 客户端和服务实例都延迟到第一次使用时创建，结束时统一释放连接
+    shared_client = None
     
-    # 创建监控器并运行
-    monitor = AppleMonitor(
-        feishu_service=feishu_service,
-        feishu_messenger=feishu_messenger,
-        apple_service=apple_service
-    )
+    def feishu_client():
+        """返回共享的飞书客户端（首次调用时创建）"""
+        nonlocal shared_client
+        if shared_client is None:
+            shared_client = build_feishu_client(settings.FEISHU_APP_ID, settings.FEISHU_APP_SECRET)
+        return shared_client
     
-    monitor.run()
+    with AppleMonitor(
+        feishu_service_factory=lambda: FeishuBitableService(
+            app_id=settings.FEISHU_APP_ID,
+            app_secret=settings.FEISHU_APP_SECRET,
+            use_cache=not args.no_cache,
+            client=feishu_client()
+        ),
+        feishu_messenger_factory=lambda: FeishuMessenger(
+            app_id=settings.FEISHU_APP_ID,
+            app_secret=settings.FEISHU_APP_SECRET,
+            client=feishu_client()
+        ),
+        apple_service_factory=AppleStoreService
+    ) as monitor:
+        monitor.run()
 
 
 if __name__ == "__main__":
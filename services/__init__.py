@@ -1,6 +1,7 @@
 """服务模块"""
+from services.feishu_client import build_feishu_client
 from services.feishu_service import FeishuBitableService
 from services.feishu_messenger import FeishuMessenger
 from services.apple_service import AppleStoreService
 
-__all__ = ['FeishuBitableService', 'FeishuMessenger', 'AppleStoreService']
+__all__ = ['build_feishu_client', 'FeishuBitableService', 'FeishuMessenger', 'AppleStoreService']
@@ -2,9 +2,52 @@
 Apple Store API 服务模块
 """
 import requests
-import json
-from typing import Optional, Dict, Any
-from utils.logger import log_info, log_warning, log_success, log_error
+import orjson
+from concurrent.futures import Executor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Any, List, Sequence
+from utils.logger import log_info, log_debug, log_warning, log_success, log_error, is_verbose
+
+# 请求的 User-Agent
+USER_AGENT = "iOSAppMonitor/1.0"
+
+# HTTP 连接池大小（需不小于并发查询的线程数）
+HTTP_POOL_SIZE = 32
+
+# 批量查询时单次请求的最大 Apple ID 数量
+LOOKUP_BATCH_SIZE = 100
+
+
+def _offline_app_info() -> Dict[str, Any]:
+    """未上线（查询不到）的应用信息"""
+    return {
+        'is_online': False,
+        'version': None,
+        'track_name': None,
+        'release_date': None,
+        'current_version_release_date': None
+    }
+
+
+def _to_app_info(result: Dict[str, Any]) -> Dict[str, Any]:
+    """将 Lookup API 返回的单条结果转换为应用信息字典"""
+    return {
+        'is_online': True,
+        'version': result.get('version'),
+        'track_name': result.get('trackName'),
+        'release_date': result.get('releaseDate'),
+        'current_version_release_date': result.get('currentVersionReleaseDate'),
+        'bundle_id': result.get('bundleId'),
+        'track_view_url': result.get('trackViewUrl')
+    }
+
+
+def _id_key(apple_id: Any) -> str:
+    """统一 Apple ID 的比较格式（兼容 int、整数值的 float 和字符串）"""
+    if isinstance(apple_id, float) and apple_id.is_integer():
+        apple_id = int(apple_id)
+    return str(apple_id).strip()
 
 
 class AppleStoreService:
@@ -12,6 +55,41 @@ class AppleStoreService:
     
     def __init__(self):
         self.api_url = "https://itunes.apple.com/lookup"
+        
+        # 复用同一个 Session，保持 keep-alive 连接，避免每次查询都重新握手
+        self._http = requests.Session()
+        self._http.headers.update({
+            'User-Agent': USER_AGENT,
+            'Connection': 'keep-alive'
+        })
+        # 限流（403/429）和 5xx 自动退避重试，服务端返回 Retry-After 时按其等待
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[403, 429, 500, 502, 503, 504],
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True
+        )
+        # 连接池不小于并发查询的线程数；pool_block 使突发请求等待空闲连接，
+        # 而不是临时创建超出上限的连接
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=retry,
+            pool_block=True
+        )
+        self._http.mount("https://", adapter)
+        self._http.mount("http://", adapter)
+    
+    def close(self) -> None:
+        """关闭 HTTP Session，释放连接池中的连接"""
+        self._http.close()
+    
+    def __enter__(self) -> 'AppleStoreService':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
     
     def query_app_status(self, apple_id: int, verbose: bool = False) -> Optional[Dict[str, Any]]:
         """
@@ -41,33 +119,18 @@ class AppleStoreService:
                 log_info(f"  API URL: {self.api_url}")
                 log_info(f"  参数: {params}")
             
-            response = requests.get(self.api_url, params=params, timeout=10)
+            response = self._http.get(self.api_url, params=params, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if data.get('resultCount', 0) == 0:
                 if verbose:
                     log_warning(f"未找到应用信息（Apple ID: {apple_id}）")
-                return {
-                    'is_online': False,
-                    'version': None,
-                    'track_name': None,
-                    'release_date': None,
-                    'current_version_release_date': None
-                }
+                return _offline_app_info()
             
             result = data['results'][0]
-            
-            app_info = {
-                'is_online': True,
-                'version': result.get('version'),
-                'track_name': result.get('trackName'),
-                'release_date': result.get('releaseDate'),
-                'current_version_release_date': result.get('currentVersionReleaseDate'),
-                'bundle_id': result.get('bundleId'),
-                'track_view_url': result.get('trackViewUrl')
-            }
+            app_info = _to_app_info(result)
             
             if verbose:
                 log_success("查询成功")
@@ -76,17 +139,124 @@ class AppleStoreService:
                 log_info(f"  是否上线: 是")
                 log_info(f"  发布日期: {app_info['release_date']}")
                 log_info(f"  当前版本发布日期: {app_info['current_version_release_date']}")
-                log_info("\n  完整信息:")
-                log_info(json.dumps(result, indent=2, ensure_ascii=False))
+                # 完整 JSON 只在 VERBOSE=1 时序列化
+                if is_verbose():
+                    log_debug("\n  完整信息:")
+                    log_debug(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
             
             return app_info
             
         except requests.exceptions.RequestException as e:
             log_error(f"请求失败: {str(e)}")
             return None
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             log_error(f"JSON 解析失败: {str(e)}")
             return None
         except Exception as e:
             log_error(f"查询异常: {str(e)}")
             return None
+    
+    def query_app_statuses(
+        self,
+        apple_ids: Sequence[int],
+        executor: Optional[Executor] = None
+    ) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        批量查询多个应用的状态
+        
+        Lookup API 支持逗号分隔的多个 id：先校验并去重（123、123.0、"123" 视为同一个 ID），
+        再每 LOOKUP_BATCH_SIZE 个 ID 发起一次请求
+        
+        Args:
+            apple_ids: Apple 应用 ID 序列
+            executor: 用于并发执行各批次请求的线程池（可选），不传时逐批查询
+        
+        Returns:
+            Apple ID -> 应用信息字典（格式同 query_app_status；未上线时 is_online 为 False，
+            ID 格式不正确或查询失败时为 None）
+        """
+        statuses: Dict[int, Optional[Dict[str, Any]]] = {}
+        
+        # 按规范化后的 ID 去重；非纯数字的 ID 会导致整批请求失败，单独标记为查询失败
+        ids_by_key: Dict[str, List[Any]] = {}
+        for apple_id in apple_ids:
+            key = _id_key(apple_id)
+            if not key.isdigit():
+                log_warning(f"Apple ID 格式不正确（{apple_id!r}），跳过查询")
+                statuses[apple_id] = None
+                continue
+            ids_by_key.setdefault(key, []).append(apple_id)
+        
+        unique_ids = [ids[0] for ids in ids_by_key.values()]
+        batches = [
+            unique_ids[start:start + LOOKUP_BATCH_SIZE]
+            for start in range(0, len(unique_ids), LOOKUP_BATCH_SIZE)
+        ]
+        if not batches:
+            return statuses
+        
+        log_info(f"🔍 批量查询 Apple Store 状态（共 {len(unique_ids)} 个 Apple ID，{len(batches)} 次请求）...")
+        if executor is not None and len(batches) > 1:
+            results = executor.map(self._lookup_batch, batches)
+        else:
+            results = map(self._lookup_batch, batches)
+        
+        # 重复的 ID 共用同一次查询结果
+        for batch_statuses in results:
+            for apple_id, app_info in batch_statuses.items():
+                for same_id in ids_by_key[_id_key(apple_id)]:
+                    statuses[same_id] = app_info
+        return statuses
+    
+    def _lookup_batch(self, apple_ids: Sequence[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        用一次请求查询一批 Apple ID
+        
+        只有错误指向请求内容本身（400 或返回结果无法解析）时才逐个重新查询，
+        避免一个异常 ID 导致同批的其他应用都查询失败；
+        限流、超时、网络错误时不再逐个重试（会成倍放大请求量），本批次记为查询失败
+        """
+        params = {
+            'id': ','.join(_id_key(apple_id) for apple_id in apple_ids),
+            'country': 'us'
+        }
+        
+        try:
+            response = self._http.get(self.api_url, params=params, timeout=10)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            results_by_id = {
+                _id_key(result['trackId']): result
+                for result in data.get('results') or []
+                if result.get('trackId') is not None
+            }
+        except requests.exceptions.HTTPError as e:
+            log_error(f"请求失败: {str(e)}")
+            if e.response is not None and e.response.status_code == 400:
+                return self._lookup_one_by_one(apple_ids)
+            return dict.fromkeys(apple_ids)
+        except requests.exceptions.RequestException as e:
+            log_error(f"请求失败: {str(e)}")
+            return dict.fromkeys(apple_ids)
+        except orjson.JSONDecodeError as e:
+            log_error(f"JSON 解析失败: {str(e)}")
+            return self._lookup_one_by_one(apple_ids)
+        except (AttributeError, KeyError, TypeError) as e:
+            log_error(f"返回数据格式异常: {str(e)}")
+            return self._lookup_one_by_one(apple_ids)
+        except Exception as e:
+            log_error(f"查询异常: {str(e)}")
+            return dict.fromkeys(apple_ids)
+        
+        statuses = {}
+        for apple_id in apple_ids:
+            result = results_by_id.get(_id_key(apple_id))
+            statuses[apple_id] = _to_app_info(result) if result is not None else _offline_app_info()
+        return statuses
+    
+    def _lookup_one_by_one(self, apple_ids: Sequence[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """批量请求因内容被拒绝后逐个查询（只有一个 ID 时不再重复请求）"""
+        if len(apple_ids) <= 1:
+            return dict.fromkeys(apple_ids)
+        log_warning(f"批量查询失败，逐个重新查询 {len(apple_ids)} 个 Apple ID")
+        return {apple_id: self.query_app_status(_id_key(apple_id)) for apple_id in apple_ids}
@@ -0,0 +1,21 @@
+"""
+飞书客户端模块
+"""
+import lark_oapi as lark
+
+
+def build_feishu_client(app_id: str, app_secret: str) -> lark.Client:
+    """
+    创建飞书 SDK 客户端
+
+    同一个客户端可以在多个服务之间共享，tenant_access_token 只需获取一次
+
+    Args:
+        app_id: 飞书应用的 App ID
+        app_secret: 飞书应用的 App Secret
+    """
+    return lark.Client.builder() \
+        .app_id(app_id) \
+        .app_secret(app_secret) \
+        .log_level(lark.LogLevel.INFO) \
+        .build()
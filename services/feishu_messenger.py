@@ -3,29 +3,73 @@
 """
 import lark_oapi as lark
 from lark_oapi.api.im.v1 import CreateMessageRequest, CreateMessageRequestBody
-from typing import List, Dict, Any, Tuple
-import json
+from typing import List, Any, Tuple, Mapping, Optional, Sequence
+import orjson
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from models.record import ApplePackageRecord
+from services.feishu_client import build_feishu_client
+from utils.retry import call_with_retry
 from utils.logger import log_info, log_warning, log_success, log_error
 
+# @ 之后的空格分隔元素
+_SPACE_PART = {"tag": "text", "text": " "}
+
+# 同一条通知并发发送到多个群聊的最大线程数
+SEND_WORKERS = 4
+
+
+@lru_cache(maxsize=32)
+def _mention_fragment(mention_all: bool, mention_user_ids: Tuple[str, ...]) -> str:
+    """
+    生成 @ 部分的 JSON 片段（每个元素后都带有分隔符，可直接拼接正文）
+    
+    同一个通知配置在多条消息之间是固定的，按配置缓存
+    """
+    parts = []
+    
+    # 添加 @ 所有人
+    if mention_all:
+        parts.append({"tag": "at", "user_id": "all"})
+        parts.append(_SPACE_PART)
+    
+    # 添加 @ 多个用户
+    for user_id in mention_user_ids:
+        parts.append({"tag": "at", "user_id": user_id})
+        parts.append(_SPACE_PART)
+    
+    return "".join(orjson.dumps(part).decode() + "," for part in parts)
+
+
+@lru_cache(maxsize=128)
+def _text_fragment(text: str) -> str:
+    """生成正文元素的 JSON 片段（同一条消息发往多个群聊时复用）"""
+    return orjson.dumps({"tag": "text", "text": text}).decode()
+
+
+def _build_post_content(mention_fragment: str, text_fragment: str) -> str:
+    """
+    拼接富文本（post）消息内容
+    
+    结果与 orjson.dumps({"zh_cn": {"title": "", "content": [[...]]}}).decode() 一致
+    """
+    return '{"zh_cn":{"title":"","content":[[' + mention_fragment + text_fragment + ']]}}'
+
 
 class FeishuMessenger:
     """飞书消息服务类"""
     
-    def __init__(self, app_id: str, app_secret: str):
+    def __init__(self, app_id: str, app_secret: str, client: Optional[lark.Client] = None):
         """
         初始化飞书客户端
         
         Args:
             app_id: 飞书应用的 App ID
             app_secret: 飞书应用的 App Secret
+            client: 共享的飞书客户端（可选），不传时新建
         """
-        self.client = lark.Client.builder() \
-            .app_id(app_id) \
-            .app_secret(app_secret) \
-            .log_level(lark.LogLevel.INFO) \
-            .build()
+        self.client = client if client is not None else build_feishu_client(app_id, app_secret)
     
     def send_message(
         self,
@@ -34,7 +78,8 @@ class FeishuMessenger:
         stage: str,
         version: str,
         mention_all: bool = False,
-        mention_user_ids: List[str] = None
+        mention_user_ids: Optional[Sequence[str]] = None,
+        message_uuid: Optional[str] = None
     ) -> bool:
         """
         发送消息到飞书群聊
@@ -45,7 +90,9 @@ class FeishuMessenger:
             stage: 阶段
             version: 版本号
             mention_all: 是否 @ 所有人
-            mention_user_ids: 要 @ 的用户 open_id 列表（可选）
+            mention_user_ids: 要 @ 的用户 open_id 序列（可选，列表或元组）
+            message_uuid: 请求去重用的 UUID（可选），同一条逻辑消息重试时应传入相同的值；
+                不传时自动生成
         
         Returns:
             发送是否成功
@@ -58,47 +105,15 @@ class FeishuMessenger:
             message_text = f"{app_name} {stage} V{version} 过审并发布了"
             
             # 构建富文本消息内容（支持 @ 功能）
-            content_parts = []
-            
-            # 添加 @ 所有人
-            if mention_all:
-                content_parts.append({
-                    "tag": "at",
-                    "user_id": "all"
-                })
-                content_parts.append({
-                    "tag": "text",
-                    "text": " "
-                })
-            
-            # 添加 @ 多个用户
-            if mention_user_ids:
-                for user_id in mention_user_ids:
-                    content_parts.append({
-                        "tag": "at",
-                        "user_id": user_id
-                    })
-                    content_parts.append({
-                        "tag": "text",
-                        "text": " "
-                    })
-            
-            # 添加消息正文
-            content_parts.append({
-                "tag": "text",
-                "text": message_text
-            })
-            
-            # 构建消息内容
-            content = json.dumps({
-                "zh_cn": {
-                    "title": "",
-                    "content": [content_parts]
-                }
-            }, ensure_ascii=False)
+            # @ 部分按通知配置缓存，正文按消息文本缓存，发送时只做字符串拼接
+            content = _build_post_content(
+                _mention_fragment(mention_all, tuple(mention_user_ids or ())),
+                _text_fragment(message_text)
+            )
             
-            # 生成唯一的 UUID
-            message_uuid = str(uuid.uuid4())
+            # 生成唯一的 UUID（飞书按 uuid 去重）
+            if not message_uuid:
+                message_uuid = uuid.uuid4().hex
             
             # 构建请求
             request = CreateMessageRequest.builder() \
@@ -114,7 +129,7 @@ class FeishuMessenger:
                 .build()
             
             # 发送消息
-            response = self.client.im.v1.message.create(request)
+            response = call_with_retry(self.client.im.v1.message.create, request)
             
             if response.success():
                 mention_info = ""
@@ -142,7 +157,7 @@ class FeishuMessenger:
 
     def send_notifications(
         self,
-        notifications: List[Dict[str, Any]],
+        notifications: Sequence[Mapping[str, Any]],
         app_name: str,
         stage: str,
         version: str
@@ -151,10 +166,10 @@ class FeishuMessenger:
         发送通知到多个飞书群聊
         
         Args:
-            notifications: 通知配置列表，每个配置包含：
+            notifications: 通知配置序列（如 settings.FEISHU_NOTIFICATIONS 的只读元组），每个配置包含：
                 - chat_id: 群聊 ID
                 - mention_all: 是否 @ 所有人（可选）
-                - mention_user_ids: 要 @ 的用户 open_id 列表（可选）
+                - mention_user_ids: 要 @ 的用户 open_id 序列（可选）
             app_name: 应用名称
             stage: 阶段
             version: 版本号
@@ -170,23 +185,35 @@ class FeishuMessenger:
             return
         
         log_info(f"📨 发送飞书通知到 {len(notifications)} 个群聊...")
+        # 每条逻辑通知一个 UUID，再按群聊派生出稳定的去重 key，
+        # 避免不同群聊之间因 uuid 相同被去重
+        notification_uuid = uuid.uuid4()
+        messages = []
         for config in notifications:
             chat_id = config.get("chat_id")
-            mention_all = config.get("mention_all", False)
-            mention_user_ids = config.get("mention_user_ids")
             
             if not chat_id:
                 log_warning("通知配置缺少 chat_id，跳过")
                 continue
             
-            self.send_message(
-                chat_id=chat_id,
-                app_name=app_name,
-                stage=stage,
-                version=version,
-                mention_all=mention_all,
-                mention_user_ids=mention_user_ids
-            )
+            messages.append({
+                "chat_id": chat_id,
+                "app_name": app_name,
+                "stage": stage,
+                "version": version,
+                "mention_all": config.get("mention_all", False),
+                "mention_user_ids": config.get("mention_user_ids"),
+                "message_uuid": uuid.uuid5(notification_uuid, chat_id).hex
+            })
+        
+        if len(messages) <= 1:
+            for message in messages:
+                self.send_message(**message)
+            return
+        
+        # 多个群聊并发发送，总耗时约为单次请求的延迟
+        with ThreadPoolExecutor(max_workers=min(SEND_WORKERS, len(messages))) as executor:
+            list(executor.map(lambda message: self.send_message(**message), messages))
     
     def send_warning_message(
         self,
@@ -240,15 +267,15 @@ class FeishuMessenger:
             ]
             
             # 构建消息内容
-            content = json.dumps({
+            content = orjson.dumps({
                 "zh_cn": {
                     "title": "",
                     "content": [content_parts]
                 }
-            }, ensure_ascii=False)
+            }).decode()
             
             # 生成唯一的 UUID
-            message_uuid = str(uuid.uuid4())
+            message_uuid = uuid.uuid4().hex
             
             # 构建请求
             request = CreateMessageRequest.builder() \
@@ -264,7 +291,7 @@ class FeishuMessenger:
                 .build()
             
             # 发送消息
-            response = self.client.im.v1.message.create(request)
+            response = call_with_retry(self.client.im.v1.message.create, request)
             
             if response.success():
                 log_success(f"数据异常警告发送成功 (@所有人)")
@@ -2,36 +2,208 @@
 飞书多维表格服务模块
 """
 import lark_oapi as lark
+import orjson
 from lark_oapi.api.bitable.v1 import (
+    BatchUpdateAppTableRecordRequest,
+    BatchUpdateAppTableRecordRequestBody,
     ListAppTableRecordRequest,
     ListAppTableRequest,
     UpdateAppTableRecordRequest
 )
 from lark_oapi.api.bitable.v1.model import AppTableRecord
 from lark_oapi.api.wiki.v2.model.get_node_space_request import GetNodeSpaceRequest
-from typing import List, Dict, Any, Optional
-from models.record import ApplePackageRecord
-from utils.logger import log_info, log_warning, log_success, log_error
+from typing import List, Dict, Any, FrozenSet, Iterable, Iterator, Optional, Sequence, Tuple
+from models.record import ApplePackageRecord, FEISHU_FIELD_NAMES
+from services.feishu_client import build_feishu_client
+from utils.cache import JsonFileCache
+from utils.retry import call_with_retry
+from utils.logger import log_info, log_debug, log_warning, log_success, log_error
+
+# 批量更新接口单次请求的最大记录数（飞书接口上限为 1000）
+BATCH_UPDATE_LIMIT = 1000
+
+# 列表接口单页最大记录数（飞书接口上限为 500）
+# 分页由上一页返回的 page_token 驱动，各页只能依次请求
+LIST_PAGE_SIZE = 500
+
+# wiki 节点 -> app_token 的本地缓存有效期（秒）
+APP_TOKEN_CACHE_TTL = 24 * 60 * 60
+
+# 连接测试结果的本地缓存有效期（秒）
+CONNECTION_CACHE_TTL = 24 * 60 * 60
+
+
+def _build_status_filter(status_field: str, statuses: Sequence[str]) -> str:
+    """
+    构建按状态筛选的服务端公式
+    
+    使用 contains 而不是等号，状态字段为多选（值为列表）时也能匹配；
+    contains 可能多匹配（例如包含该文字的其他选项），由本地的精确匹配再过滤一次
+    
+    例如: OR(CurrentValue.[包状态].contains("提审中"),CurrentValue.[包状态].contains("已发布"))
+    """
+    conditions = [
+        f'CurrentValue.[{status_field}].contains("{status}")'
+        for status in statuses
+    ]
+    if len(conditions) == 1:
+        return conditions[0]
+    return f"OR({','.join(conditions)})"
+
+
+class _ListRequestError(Exception):
+    """列表接口请求失败（用于在流式读取中途通知调用方回退）"""
+
+    def __init__(self, code: Any, msg: Any):
+        super().__init__(f"{code}, {msg}")
+        self.code = code
+        self.msg = msg
+
+
+def _status_set(status_value: Any) -> FrozenSet[str]:
+    """
+    将状态字段的值解析为状态集合（兼容单选和多选两种字段格式）
+    
+    每条记录只解析一次，之后的匹配都是集合运算
+    """
+    if status_value is None:
+        return frozenset()
+    if isinstance(status_value, list):
+        return frozenset(map(str, status_value))
+    return frozenset((str(status_value),))
+
+
+def _extract_parent_ids(parent_value: Any) -> FrozenSet[str]:
+    """
+    提取父记录字段中关联的所有记录 ID
+    
+    字段为空或格式不符（非列表、列表项不是字典、record_ids 为 None）时返回空集合
+    """
+    if not parent_value:
+        return frozenset()
+    try:
+        return frozenset(
+            pid
+            for item in parent_value
+            for pid in (item.get('record_ids') or ())
+        )
+    except (TypeError, AttributeError):
+        # 混有非字典项时退回逐项检查
+        if not isinstance(parent_value, list):
+            return frozenset()
+        return frozenset(
+            pid
+            for item in parent_value
+            if isinstance(item, dict)
+            for pid in (item.get('record_ids') or ())
+        )
+
+
+def _is_parent_empty(parent_value: Any) -> bool:
+    """
+    判断父记录字段是否为空
+    
+    字段缺失、None、空字符串、空列表，或列表中没有任何带 record_ids/text 的关联项时视为空
+    """
+    if isinstance(parent_value, list):
+        return not any(
+            isinstance(item, dict) and (item.get('record_ids') or item.get('text'))
+            for item in parent_value
+        )
+    return parent_value is None or parent_value == ""
+
+
+def _collect_main_apps_and_children(
+    raw_records: Iterable[Dict[str, Any]],
+    status_field: str,
+    main_statuses: Sequence[str],
+    parent_field: str,
+    child_statuses: Sequence[str]
+) -> Tuple[List[ApplePackageRecord], Dict[str, List[Dict[str, Any]]], int]:
+    """
+    一次遍历记录：筛选主应用，并按父记录 ID 索引状态有效的子记录
+    
+    主应用：包状态属于 main_statuses 且父记录为空（解析为 ApplePackageRecord）
+    子记录：父记录不为空且包状态属于 child_statuses（保留原始记录，按需解析）
+    
+    Returns:
+        (主应用列表, 父记录 ID -> 原始子记录列表, 读取的记录总数)
+    """
+    main_apps: List[ApplePackageRecord] = []
+    children_by_parent: Dict[str, List[Dict[str, Any]]] = {}
+    total = 0
+    main_statuses = frozenset(main_statuses)
+    child_statuses = frozenset(child_statuses)
+    # 主应用和子记录关心的全部状态，用于在处理父记录字段之前提前排除
+    wanted_statuses = main_statuses | child_statuses
+    
+    for raw_record in raw_records:
+        total += 1
+        fields = raw_record['fields']
+        if not fields:
+            continue
+        
+        statuses = _status_set(fields.get(status_field))
+        if wanted_statuses.isdisjoint(statuses):
+            continue
+        
+        parent_value = fields.get(parent_field)
+        
+        # 父记录字段只遍历一次：有关联 ID 的一定是子记录，
+        # 没有 ID 时才需要再按 text 判断是否为空
+        parent_ids = _extract_parent_ids(parent_value)
+        
+        # 主应用：包状态匹配且父记录为空
+        if not parent_ids and _is_parent_empty(parent_value):
+            if not main_statuses.isdisjoint(statuses):
+                main_apps.append(ApplePackageRecord.from_feishu_fields(
+                    fields=fields,
+                    record_id=raw_record['record_id']
+                ))
+            continue
+        
+        # 子记录：只保留状态为"提审中"或"已发布"的记录
+        if child_statuses.isdisjoint(statuses):
+            continue
+        for pid in parent_ids:
+            children_by_parent.setdefault(pid, []).append(raw_record)
+    
+    return main_apps, children_by_parent, total
 
 
 class FeishuBitableService:
     """飞书多维表格服务类"""
     
-    def __init__(self, app_id: str, app_secret: str):
+    def __init__(
+        self,
+        app_id: str,
+        app_secret: str,
+        app_token_cache: Optional[JsonFileCache] = None,
+        connection_cache: Optional[JsonFileCache] = None,
+        use_cache: bool = True,
+        client: Optional[lark.Client] = None
+    ):
         """
         初始化飞书客户端
         
         Args:
             app_id: 飞书应用的 App ID
             app_secret: 飞书应用的 App Secret
+            app_token_cache: wiki 节点 -> app_token 的持久化缓存（可选），
+                默认使用 ~/.cache/ios_app_monitor 下的 JSON 文件，有效期 24 小时
+            connection_cache: 连接测试结果的持久化缓存（可选），默认同上
+            use_cache: 是否读取已有的持久化缓存；为 False 时总是请求接口，并用结果刷新缓存
+            client: 共享的飞书客户端（可选），不传时新建
         """
         self.app_id = app_id
         self.app_secret = app_secret
-        self.client = lark.Client.builder() \
-            .app_id(app_id) \
-            .app_secret(app_secret) \
-            .log_level(lark.LogLevel.INFO) \
-            .build()
+        self.use_cache = use_cache
+        self._app_tokens: Dict[str, str] = {}
+        self._app_token_cache = app_token_cache if app_token_cache is not None \
+            else JsonFileCache("wiki_app_token", APP_TOKEN_CACHE_TTL)
+        self._connection_cache = connection_cache if connection_cache is not None \
+            else JsonFileCache("connection_check", CONNECTION_CACHE_TTL)
+        self.client = client if client is not None else build_feishu_client(app_id, app_secret)
     
     def get_app_token_from_wiki(self, wiki_node_token: str) -> Optional[str]:
         """
@@ -43,13 +215,23 @@ class FeishuBitableService:
         Returns:
             多维表格的 app_token（即 obj_token），如果失败返回 None
         """
+        # 优先使用缓存（进程内 -> 本地文件）
+        app_token = self._app_tokens.get(wiki_node_token)
+        if not app_token and self.use_cache:
+            app_token = self._app_token_cache.get(wiki_node_token)
+            if app_token:
+                self._app_tokens[wiki_node_token] = app_token
+        if app_token:
+            log_success(f"使用缓存的 app_token: {app_token}")
+            return app_token
+        
         log_info(f"🔍 从知识库节点获取 app_token，节点 token: {wiki_node_token}")
         try:
             request = GetNodeSpaceRequest.builder() \
                 .token(wiki_node_token) \
                 .build()
             
-            response = self.client.wiki.v2.space.get_node(request)
+            response = call_with_retry(self.client.wiki.v2.space.get_node, request)
             
             if response.success():
                 node = response.data.node
@@ -62,6 +244,8 @@ class FeishuBitableService:
                 
                 if obj_type == "bitable":
                     log_success("确认是多维表格节点")
+                    self._app_tokens[wiki_node_token] = obj_token
+                    self._app_token_cache.set(wiki_node_token, obj_token)
                     return obj_token
                 else:
                     log_warning(f"节点类型不是多维表格 (bitable)，而是: {obj_type}")
@@ -87,12 +271,16 @@ class FeishuBitableService:
         Returns:
             连接是否成功
         """
+        if self.use_cache and self._connection_cache.get(app_token):
+            log_success("连接成功（使用缓存的连接测试结果）")
+            return True
+        
         try:
             request = ListAppTableRequest.builder() \
                 .app_token(app_token) \
                 .build()
             
-            response = self.client.bitable.v1.app_table.list(request)
+            response = call_with_retry(self.client.bitable.v1.app_table.list, request)
             
             if response.success():
                 tables = response.data.items
@@ -101,6 +289,7 @@ class FeishuBitableService:
                 for table in tables:
                     log_info(f"  - 表格名称: {table.name}")
                     log_info(f"    表格 ID: {table.table_id}")
+                self._connection_cache.set(app_token, True)
                 return True
             else:
                 log_error(f"连接失败: {response.code}, {response.msg}")
@@ -113,7 +302,9 @@ class FeishuBitableService:
         self,
         app_token: str,
         table_id: str,
-        view_id: Optional[str] = None
+        view_id: Optional[str] = None,
+        filter_formula: Optional[str] = None,
+        field_names: Optional[Sequence[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         获取所有记录（用于后续筛选）
@@ -122,31 +313,74 @@ class FeishuBitableService:
             app_token: 多维表格的应用 Token
             table_id: 表格 ID
             view_id: 视图 ID（可选）
+            filter_formula: 服务端筛选公式（可选），例如 CurrentValue.[包状态]="提审中"
+            field_names: 只返回这些字段（可选），默认返回全部字段
         
         Returns:
             所有记录的列表（包含 record_id 和 fields）
         """
-        all_records = []
+        return list(self.iter_all_records(app_token, table_id, view_id, filter_formula, field_names))
+
+    def iter_all_records(
+        self,
+        app_token: str,
+        table_id: str,
+        view_id: Optional[str] = None,
+        filter_formula: Optional[str] = None,
+        field_names: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐条返回所有记录（按页请求，内存中只保留当前页）
+        
+        参数同 get_all_records；请求失败时记录错误并停止迭代
+        
+        Yields:
+            包含 record_id 和 fields 的记录字典
+        """
+        try:
+            yield from self._iter_records(app_token, table_id, view_id, filter_formula, field_names)
+        except _ListRequestError as e:
+            log_error(f"请求失败: {e.code}, {e.msg}")
+            return
+
+    def _iter_records(
+        self,
+        app_token: str,
+        table_id: str,
+        view_id: Optional[str] = None,
+        filter_formula: Optional[str] = None,
+        field_names: Optional[Sequence[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        分页读取记录，请求失败时抛出 _ListRequestError（由调用方决定如何记录和回退）
+        """
         page_token = None
+        # SDK 要求传入 JSON 编码的字段名数组，所有分页请求共用同一份编码结果
+        encoded_field_names = orjson.dumps(list(field_names)).decode() if field_names else None
         
         while True:
             request_builder = ListAppTableRecordRequest.builder() \
                 .app_token(app_token) \
                 .table_id(table_id) \
-                .page_size(500)
+                .page_size(LIST_PAGE_SIZE)
             
             if view_id:
                 request_builder.view_id(view_id)
             
+            if filter_formula:
+                request_builder.filter(filter_formula)
+            
+            if encoded_field_names:
+                request_builder.field_names(encoded_field_names)
+            
             if page_token:
                 request_builder.page_token(page_token)
             
             request = request_builder.build()
-            response = self.client.bitable.v1.app_table_record.list(request)
+            response = call_with_retry(self.client.bitable.v1.app_table_record.list, request)
             
             if not response.success():
-                log_error(f"请求失败: {response.code}, {response.msg}")
-                break
+                raise _ListRequestError(response.code, response.msg)
             
             items = response.data.items
             if not items:
@@ -154,17 +388,15 @@ class FeishuBitableService:
             
             for record in items:
                 if record.fields:
-                    all_records.append({
+                    yield {
                         'record_id': record.record_id,
                         'fields': record.fields
-                    })
+                    }
             
             if not response.data.has_more:
                 break
             
             page_token = response.data.page_token
-        
-        return all_records
 
     def get_records_by_status(
         self, 
@@ -173,7 +405,8 @@ class FeishuBitableService:
         status_field: str = "包状态",
         target_status: str = "提审中",
         view_id: Optional[str] = None,
-        parent_field: str = "父记录"
+        parent_field: str = "父记录",
+        field_names: Optional[Sequence[str]] = None
     ) -> List[ApplePackageRecord]:
         """
         获取指定状态的主应用记录及其所有子记录（版本记录）
@@ -182,6 +415,8 @@ class FeishuBitableService:
         1. 查找所有父记录为空且包状态=提审中的记录（主应用）
         2. 查找这些主应用的所有子记录（版本记录），只包含状态为"提审中"或"已发布"的子记录
         
+        记录按页流式读取，一次遍历同时完成主应用筛选和子记录索引
+        
         Args:
             app_token: 多维表格的应用 Token
             table_id: 表格 ID
@@ -189,6 +424,7 @@ class FeishuBitableService:
             target_status: 目标状态值，默认为"提审中"
             view_id: 视图 ID（可选），如果提供则只读取该视图下的数据
             parent_field: 父记录字段名称，默认为"父记录"
+            field_names: 需要读取的字段（可选），默认为模型用到的全部字段（FEISHU_FIELD_NAMES）
         
         Returns:
             主应用记录列表（每个记录包含其子记录）
@@ -200,114 +436,73 @@ class FeishuBitableService:
         if view_id:
             log_info(f"  view_id: {view_id} (指定视图)")
         
-        # 步骤1: 获取所有记录
-        log_info("步骤1: 获取所有记录...")
-        all_raw_records = self.get_all_records(app_token, table_id, view_id)
-        log_info(f"  共获取 {len(all_raw_records)} 条记录")
+        valid_child_statuses = ["提审中", "已发布"]
         
-        # 步骤2: 筛选父记录为空且包状态=提审中的主应用记录
-        log_info("步骤2: 筛选主应用记录（父记录为空且包状态=提审中）...")
-        main_apps: List[ApplePackageRecord] = []
-        main_app_record_ids = set()
+        # 步骤1: 读取记录，同时筛选主应用、建立子记录索引
+        # 主应用和子记录只关心"提审中"/"已发布"两种状态，优先交给服务端筛选，并只请求需要的列；
+        # 表格缺少某一列时去掉列筛选重试，服务端仍不接受筛选公式时退回到全量读取
+        log_info("步骤1: 读取记录（服务端按包状态筛选）并筛选主应用...")
+        statuses = [target_status] + [s for s in valid_child_statuses if s != target_status]
+        filter_formula = _build_status_filter(status_field, statuses)
+        log_info(f"  筛选公式: {filter_formula}")
+        # 筛选依赖的状态和父记录字段总是包含在内
+        field_names = list(dict.fromkeys(
+            [status_field, parent_field, *(field_names or FEISHU_FIELD_NAMES)]
+        ))
         
-        for raw_record in all_raw_records:
-            fields = raw_record['fields']
-            if not fields:
-                continue
-            
-            # 检查包状态
-            status_match = False
-            if status_field in fields:
-                status_value = fields[status_field]
-                if isinstance(status_value, list):
-                    status_text = [str(item) for item in status_value]
-                    status_match = target_status in status_text
-                else:
-                    status_match = str(status_value) == target_status
-            
-            if not status_match:
-                continue
-            
-            # 检查父记录是否为空
-            parent_empty = False
-            if parent_field not in fields:
-                parent_empty = True
-            else:
-                parent_value = fields[parent_field]
-                if isinstance(parent_value, list):
-                    if len(parent_value) == 0:
-                        parent_empty = True
-                    else:
-                        is_empty = True
-                        for item in parent_value:
-                            if isinstance(item, dict):
-                                if 'record_ids' in item and item.get('record_ids'):
-                                    is_empty = False
-                                    break
-                                if 'text' in item and item.get('text'):
-                                    is_empty = False
-                                    break
-                        parent_empty = is_empty
-                elif parent_value is None or parent_value == "":
-                    parent_empty = True
-            
-            if status_match and parent_empty:
-                package_record = ApplePackageRecord.from_feishu_fields(
-                    fields=fields,
-                    record_id=raw_record['record_id']
-                )
-                main_apps.append(package_record)
-                main_app_record_ids.add(raw_record['record_id'])
+        def collect(records: Iterable[Dict[str, Any]]):
+            return _collect_main_apps_and_children(
+                records, status_field, (target_status,), parent_field, valid_child_statuses
+            )
         
+        try:
+            main_apps, children_by_parent, total = collect(
+                self._iter_records(app_token, table_id, view_id, filter_formula, field_names)
+            )
+        except _ListRequestError as e:
+            log_warning(f"按字段列表读取失败（{e.code}, {e.msg}），可能是表格缺少部分字段，改为读取全部字段")
+            try:
+                main_apps, children_by_parent, total = collect(
+                    self._iter_records(app_token, table_id, view_id, filter_formula)
+                )
+            except _ListRequestError as e:
+                log_warning(f"服务端筛选失败（{e.code}, {e.msg}），改为读取全部记录后在本地筛选")
+                main_apps, children_by_parent, total = collect(
+                    self.iter_all_records(app_token, table_id, view_id)
+                )
+        log_info(f"  共获取 {total} 条记录")
         log_info(f"  找到 {len(main_apps)} 个主应用")
         
-        # 步骤3: 查找每个主应用的所有子记录（版本记录）
+        # 没有主应用时无需再查找子记录
+        if not main_apps:
+            log_success("查询完成，没有符合条件的主应用")
+            return []
+        
+        # 步骤2: 从索引中取出每个主应用的子记录（版本记录）
         # 只包含状态为"提审中"或"已发布"的子记录
-        log_info("步骤3: 查找每个主应用的子记录（版本记录）...")
+        log_info("步骤2: 查找每个主应用的子记录（版本记录）...")
         log_info("  子记录过滤条件: 包状态 = '提审中' 或 '已发布'")
-        valid_child_statuses = ["提审中", "已发布"]
         
+        # 只解析属于主应用的子记录；每条记录最多解析一次，
+        # 同时属于多个主应用的子记录共用同一个实例
+        parsed_children: Dict[str, ApplePackageRecord] = {}
         for main_app in main_apps:
             children = []
-            for raw_record in all_raw_records:
-                fields = raw_record['fields']
-                if not fields or parent_field not in fields:
-                    continue
-                
-                # 检查该记录是否指向当前主应用
-                parent_value = fields[parent_field]
-                if isinstance(parent_value, list):
-                    for item in parent_value:
-                        if isinstance(item, dict):
-                            record_ids = item.get('record_ids', [])
-                            # 确保 record_ids 不为 None
-                            if record_ids and main_app.record_id in record_ids:
-                                # 这是当前主应用的子记录，检查状态
-                                child_status = None
-                                if status_field in fields:
-                                    status_value = fields[status_field]
-                                    if isinstance(status_value, list):
-                                        child_status = [str(item) for item in status_value]
-                                    else:
-                                        child_status = str(status_value)
-                                
-                                # 只添加状态为"提审中"或"已发布"的子记录
-                                status_valid = False
-                                if isinstance(child_status, list):
-                                    status_valid = any(s in valid_child_statuses for s in child_status)
-                                elif child_status:
-                                    status_valid = child_status in valid_child_statuses
-                                
-                                if status_valid:
-                                    child_record = ApplePackageRecord.from_feishu_fields(
-                                        fields=fields,
-                                        record_id=raw_record['record_id']
-                                    )
-                                    children.append(child_record)
-                                break
-            
-            main_app.children = children
-            log_info(f"  主应用 {main_app.package_name} (ID: {main_app.record_id}) 有 {len(children)} 条有效版本记录")
+            for raw_record in children_by_parent.get(main_app.record_id, []):
+                record_id = raw_record['record_id']
+                child_record = parsed_children.get(record_id)
+                if child_record is None:
+                    child_record = ApplePackageRecord.from_feishu_fields(
+                        fields=raw_record['fields'],
+                        record_id=record_id
+                    )
+                    parsed_children[record_id] = child_record
+                children.append(child_record)
+            main_app.set_children(children)
+            log_debug(
+                "  主应用 %s (ID: %s) 有 %s 条有效版本记录",
+                main_app.package_name, main_app.record_id, len(children)
+            )
         
         log_success(f"查询完成，共找到 {len(main_apps)} 个主应用及其版本记录")
         return main_apps
@@ -345,7 +540,7 @@ class FeishuBitableService:
                 .build()
             
             # 发起请求
-            response = self.client.bitable.v1.app_table_record.update(request)
+            response = call_with_retry(self.client.bitable.v1.app_table_record.update, request)
             
             if response.success():
                 # 格式化更新信息
@@ -361,3 +556,71 @@ class FeishuBitableService:
         except Exception as e:
             log_error(f"更新异常: Record ID {record_id}, 错误: {str(e)}")
             return False
+
+    def batch_update_record_fields(
+        self,
+        app_token: str,
+        table_id: str,
+        updates: List[Dict[str, Any]]
+    ) -> bool:
+        """
+        批量更新飞书表格中多条记录的字段
+
+        按 BATCH_UPDATE_LIMIT 分批调用 batch_update 接口，每批一次请求
+
+        Args:
+            app_token: 多维表格的应用 Token
+            table_id: 表格 ID
+            updates: 更新列表，每个元素包含：
+                - record_id: 记录 ID
+                - fields: 要更新的字段字典，例如 {"包状态": "已发布"}
+
+        Returns:
+            所有批次是否都更新成功
+        """
+        if not updates:
+            return True
+
+        all_success = True
+        for start in range(0, len(updates), BATCH_UPDATE_LIMIT):
+            chunk = updates[start:start + BATCH_UPDATE_LIMIT]
+            record_ids = [update['record_id'] for update in chunk]
+            try:
+                # 构建请求
+                request = BatchUpdateAppTableRecordRequest.builder() \
+                    .app_token(app_token) \
+                    .table_id(table_id) \
+                    .request_body(
+                        BatchUpdateAppTableRecordRequestBody.builder()
+                        .records([
+                            AppTableRecord.builder()
+                            .record_id(update['record_id'])
+                            .fields(update['fields'])
+                            .build()
+                            for update in chunk
+                        ])
+                        .build()
+                    ) \
+                    .build()
+
+                # 发起请求
+                response = call_with_retry(self.client.bitable.v1.app_table_record.batch_update, request)
+
+                if response.success():
+                    log_success(f"批量更新成功: {len(chunk)} 条记录")
+                    for update in chunk:
+                        update_info = ", ".join([f"{k}={v}" for k, v in update['fields'].items()])
+                        log_info(f"  - Record ID {update['record_id']} ({update_info})")
+                else:
+                    all_success = False
+                    log_error(f"批量更新失败: {len(chunk)} 条记录")
+                    log_info(f"  错误码: {response.code}")
+                    log_info(f"  错误信息: {response.msg}")
+                    log_info(f"  Record IDs: {', '.join(record_ids)}")
+
+            except Exception as e:
+                all_success = False
+                log_error(f"批量更新异常: {len(chunk)} 条记录, 错误: {str(e)}")
+                log_info(f"  Record IDs: {', '.join(record_ids)}")
+
+        return all_success
@@ -1,22 +1,32 @@
 """工具模块"""
 from utils.logger import (
     is_github_actions,
+    is_verbose,
     log_group,
     log_endgroup,
     log_info,
+    log_block,
+    log_debug,
     log_warning,
     log_error,
     log_success
 )
 from utils.url_parser import parse_wiki_url
+from utils.cache import JsonFileCache
+from utils.retry import call_with_retry
 
 __all__ = [
     'is_github_actions',
+    'is_verbose',
     'log_group',
     'log_endgroup',
     'log_info',
+    'log_block',
+    'log_debug',
     'log_warning',
     'log_error',
     'log_success',
-    'parse_wiki_url'
+    'parse_wiki_url',
+    'JsonFileCache',
+    'call_with_retry'
 ]
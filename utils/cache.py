@@ -0,0 +1,65 @@
+"""
+本地 JSON 文件缓存模块
+
+用于在多次运行之间缓存稳定的值（例如 wiki 节点对应的 app_token），
+读写失败时静默降级为不使用缓存
+"""
+import orjson
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "ios_app_monitor"
+
+
+class JsonFileCache:
+    """带 TTL 的 JSON 文件缓存"""
+
+    def __init__(self, name: str, ttl_seconds: int, cache_dir: Optional[Path] = None):
+        """
+        Args:
+            name: 缓存名称（对应缓存目录下的 <name>.json）
+            ttl_seconds: 缓存有效期（秒）
+            cache_dir: 缓存目录，默认为 ~/.cache/ios_app_monitor
+        """
+        self.path = Path(cache_dir or DEFAULT_CACHE_DIR) / f"{name}.json"
+        self.ttl_seconds = ttl_seconds
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            data = orjson.loads(self.path.read_bytes())
+            return data if isinstance(data, dict) else {}
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存值
+
+        Returns:
+            未过期的缓存值，不存在或已过期时返回 None
+        """
+        entry = self._load().get(key)
+        if not isinstance(entry, dict):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        """写入缓存值（同时清理已过期的条目）"""
+        now = time.time()
+        data = {
+            k: v for k, v in self._load().items()
+            if isinstance(v, dict) and v.get("expires_at", 0) >= now
+        }
+        data[key] = {"value": value, "expires_at": now + self.ttl_seconds}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_bytes(orjson.dumps(data))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -3,55 +3,127 @@
 提供 GitHub Actions 兼容的日志输出功能
 """
 import os
-from datetime import datetime
+import sys
+import time
+from functools import lru_cache
+from typing import Iterable
 
+# 本地运行时日志组的分隔线
+_SEP = "=" * 60
 
+
+# 最近一次格式化的时间戳：(整数秒, 格式化字符串)
+_last_timestamp = (0, "")
+
+
+def _timestamp() -> str:
+    """返回当前时间戳字符串，同一秒内复用上次的格式化结果"""
+    global _last_timestamp
+    now = int(time.time())
+    cached = _last_timestamp
+    if cached[0] != now:
+        cached = (now, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now)))
+        _last_timestamp = cached
+    return cached[1]
+
+
+@lru_cache(maxsize=None)
 def is_github_actions() -> bool:
-    """检查是否在 GitHub Actions 环境中运行"""
+    """检查是否在 GitHub Actions 环境中运行，首次调用后缓存结果"""
     return os.getenv('GITHUB_ACTIONS') == 'true'
 
 
+def _prefix() -> str:
+    """
+    日志行前缀
+
+    GitHub Actions 会为每行输出自动加上时间戳，此时不再重复输出本地时间戳
+    """
+    if is_github_actions():
+        return ""
+    return f"[{_timestamp()}] "
+
+
+@lru_cache(maxsize=None)
+def is_verbose() -> bool:
+    """检查是否开启详细日志（VERBOSE=1），首次调用后缓存结果"""
+    return os.getenv('VERBOSE') == '1'
+
+
+def _format(message: str, args: tuple) -> str:
+    """按 % 风格延迟格式化日志参数"""
+    return message % args if args else message
+
+
 def log_group(title: str):
     """开始一个可折叠的日志组"""
     if is_github_actions():
         print(f"::group::{title}")
     else:
-        print(f"\n{'='*60}")
-        print(f"{title}")
-        print(f"{'='*60}")
+        print(f"\n{_SEP}\n{title}\n{_SEP}")
 
 
 def log_endgroup():
-    """结束日志组"""
+    """
+    结束日志组
+
+    stdout 为管道时（如 GitHub Actions）按块缓冲，组内日志合并写入；
+    在组结束时刷新，保证每个步骤的日志及时出现在 CI 输出中
+    """
     if is_github_actions():
         print("::endgroup::")
+    sys.stdout.flush()
+
+
+def log_info(message: str, *args):
+    """
+    输出信息日志
+
+    支持 % 风格参数，例如 log_info("版本: %s", version)
+    """
+    print(f"{_prefix()}{_format(message, args)}")
+
+
+def log_block(lines: Iterable[str]):
+    """
+    输出一组信息日志
+
+    所有行使用同一个时间戳，合并为一次写入，适合逐条记录输出的多行详情
+    """
+    prefix = _prefix()
+    print("\n".join(f"{prefix}{line}" for line in lines))
+
 
+def log_debug(message: str, *args):
+    """
+    输出调试日志（仅在 VERBOSE=1 时输出）
 
-def log_info(message: str):
-    """输出信息日志"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"[{timestamp}] {message}")
+    未开启时直接返回，不会格式化参数，适合在循环中使用
+    """
+    if not is_verbose():
+        return
+    print(f"{_prefix()}{_format(message, args)}")
 
 
-def log_warning(message: str):
+def log_warning(message: str, *args):
     """输出警告日志"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    message = _format(message, args)
     if is_github_actions():
         print(f"::warning::{message}")
-    print(f"[{timestamp}] ⚠️  {message}")
+    print(f"{_prefix()}⚠️  {message}")
 
 
-def log_error(message: str):
+def log_error(message: str, *args):
     """输出错误日志"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    message = _format(message, args)
     if is_github_actions():
         print(f"::error::{message}")
-    print(f"[{timestamp}] ❌ {message}")
+    print(f"{_prefix()}❌ {message}")
 
 
-def log_success(message: str):
+def log_success(message: str, *args):
     """输出成功日志"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    message = _format(message, args)
     if is_github_actions():
         print(f"::notice::{message}")
-    print(f"[{timestamp}] ✅ {message}")
+    print(f"{_prefix()}✅ {message}")
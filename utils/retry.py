@@ -0,0 +1,45 @@
+"""
+飞书接口重试工具模块
+"""
+import time
+from typing import Any, Callable, TypeVar
+from utils.logger import log_warning
+
+T = TypeVar("T")
+
+# 可重试的飞书错误码（频率限制、写冲突、数据未就绪、服务端超时）
+RETRYABLE_CODES = frozenset({
+    99991400,   # 请求过于频繁
+    230020,     # 消息：群聊发送频率超限
+    1254290,    # 多维表格：请求过于频繁
+    1254291,    # 多维表格：写冲突
+    1254607,    # 多维表格：数据未就绪
+    1255040,    # 多维表格：请求超时
+})
+
+# 最大重试次数（不含首次请求）
+MAX_RETRIES = 3
+
+# 退避基数（秒），第 n 次重试前等待 RETRY_BACKOFF * 2^(n-1)
+RETRY_BACKOFF = 0.5
+
+
+def call_with_retry(func: Callable[[Any], T], request: Any) -> T:
+    """
+    调用飞书 SDK 接口，遇到可重试的错误码时按指数退避重试
+
+    Args:
+        func: SDK 接口方法，例如 client.bitable.v1.app_table_record.list
+        request: 请求对象
+
+    Returns:
+        最后一次调用的响应（成功、不可重试的失败或重试次数用尽）
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        response = func(request)
+        if response.success() or response.code not in RETRYABLE_CODES or attempt == MAX_RETRIES:
+            return response
+        delay = RETRY_BACKOFF * (2 ** attempt)
+        log_warning("飞书接口返回 %s (%s)，%.1f 秒后重试（%s/%s）",
+                    response.code, response.msg, delay, attempt + 1, MAX_RETRIES)
+        time.sleep(delay)
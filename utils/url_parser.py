@@ -2,6 +2,7 @@
 URL 解析工具模块
 """
 from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 from utils.logger import log_error
 
 
@@ -18,22 +19,15 @@ def parse_wiki_url(url: str) -> Tuple[Optional[str], Optional[str], Optional[str
     try:
         # 从 URL 中提取 wiki 节点 token
         # 格式: https://xxx.feishu.cn/wiki/NODE_TOKEN?table=TABLE_ID&view=VIEW_ID
-        if "/wiki/" in url:
-            parts = url.split("/wiki/")[1].split("?")[0]
-            wiki_node_token = parts
+        parsed = urlparse(url)
+        _, sep, wiki_node_token = parsed.path.partition("/wiki/")
+        if sep:
+            # 提取 table_id 和 view_id（parse_qs 会处理 URL 编码）
+            query = parse_qs(parsed.query)
+            table_id = query.get("table", [None])[0]
+            view_id = query.get("view", [None])[0]
             
-            # 提取 table_id 和 view_id
-            table_id = None
-            view_id = None
-            if "?" in url:
-                params = url.split("?")[1]
-                for param in params.split("&"):
-                    if param.startswith("table="):
-                        table_id = param.split("=")[1]
-                    elif param.startswith("view="):
-                        view_id = param.split("=")[1]
-            
-            return wiki_node_token, table_id, view_id
+            return wiki_node_token or None, table_id, view_id
     except Exception as e:
         log_error(f"解析 URL 失败: {str(e)}")
     